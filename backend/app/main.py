@@ -1,24 +1,24 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Optional, Dict
-import json
 from pathlib import Path
+from pydantic import BaseModel, TypeAdapter
 
 from app.models import (
     UserProfile, Job, JobMatch, JobFeedResponse,
     ExplainabilityBreakdown
 )
 from app.services.matching import get_matcher
-from app.services.scoring import calculate_fit_score
-from app.services.decision import make_decision, estimate_competition, assess_career_impact
-from app.services.explainer import generate_explanation
-from app.services.detector import detect_ghost_job
+from app.services.scoring_kernels import decision_candidates, needs_analysis
+from app.state import AppState, ProfileSnapshot, get_state, stats_key
 
 app = FastAPI(
     title="ApplyLess API",
     description="AI-powered job matching that helps you apply less and grow more",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for frontend
@@ -30,10 +30,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory storage (for hackathon - replace with real DB later)
-current_profile: Optional[UserProfile] = None
-jobs_database: List[Job] = []
-job_embeddings_cache: Dict[str, object] = {}  # job_id -> numpy array
+# Validates the whole jobs dataset in a single pydantic-core call
+_JOBS_ADAPTER = TypeAdapter(List[Job])
 
 # Create uploads directory if it doesn't exist
 UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
@@ -42,37 +40,47 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 @app.on_event("startup")
 async def load_jobs():
     """Load jobs from dataset on startup"""
-    global jobs_database, job_embeddings_cache
-    
     data_path = Path(__file__).parent.parent / "data" / "jobs_dataset.json"
     
     # Initialize the semantic matcher (loads the model)
     matcher = get_matcher()
     print("[SUCCESS] Semantic matcher initialized")
     
+    state = AppState(matcher=matcher)
+    app.state.data = state
+    
     if data_path.exists():
-        with open(data_path, 'r', encoding='utf-8') as f:
-            jobs_data = json.load(f)
-            jobs_database = [Job(**job) for job in jobs_data]
-        print(f"[SUCCESS] Loaded {len(jobs_database)} jobs from dataset")
+        # Parse and validate in one pass inside pydantic-core
+        dataset_bytes = data_path.read_bytes()
+        jobs = _JOBS_ADAPTER.validate_json(dataset_bytes)
+        print(f"[SUCCESS] Loaded {len(jobs)} jobs from dataset")
         
-        # Pre-compute embeddings
+        # Pre-compute embeddings (jobs are immutable, so this happens exactly once,
+        # and is skipped entirely when an on-disk cache for this dataset exists)
         print("Embeddings generation started...")
-        for job in jobs_database:
-            job_embeddings_cache[job.job_id] = matcher.create_job_embedding(job)
-        print(f"[SUCCESS] Pre-computed embeddings for {len(job_embeddings_cache)} jobs")
+        state.set_jobs(jobs, data_path, dataset_bytes)
+        print(f"[SUCCESS] Pre-computed embeddings for {len(state.job_rows)} jobs")
         
     else:
         print("[WARNING] No jobs dataset found, using empty database")
+    
+    # Start coalescing concurrent embedding requests
+    matcher.batcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    """Stop the embedding batcher"""
+    await get_matcher().batcher.stop()
 
 
 @app.get("/")
-async def root():
+async def root(state: AppState = Depends(get_state)):
     """Health check endpoint"""
     return {
         "message": "ApplyLess API is running",
         "version": "1.0.0",
-        "jobs_loaded": len(jobs_database)
+        "jobs_loaded": len(state.jobs)
     }
 
 
@@ -123,10 +131,9 @@ async def upload_cv(file: UploadFile = File(...)):
 
 
 @app.post("/api/profile")
-async def save_profile(profile: UserProfile):
+async def save_profile(profile: UserProfile, state: AppState = Depends(get_state)):
     """Save or update user profile"""
-    global current_profile
-    current_profile = profile
+    state.set_profile(profile)
     return {
         "message": "Profile saved successfully",
         "user_id": profile.user_id
@@ -134,146 +141,149 @@ async def save_profile(profile: UserProfile):
 
 
 @app.get("/api/profile")
-async def get_profile():
+async def get_profile(state: AppState = Depends(get_state)):
     """Get current user profile"""
-    if not current_profile:
+    if not state.profile:
         raise HTTPException(status_code=404, detail="No profile found")
-    return current_profile
+    return state.profile
 
 
 @app.get("/api/jobs", response_model=JobFeedResponse)
 async def get_job_feed(
     page: int = 1,
     page_size: int = 20,
-    decision_filter: Optional[str] = None  # Apply, Wait, Skip, Avoid
+    decision_filter: Optional[str] = None,  # Apply, Wait, Skip, Avoid
+    state: AppState = Depends(get_state)
 ):
     """Get personalized job feed with rankings"""
     
-    if not current_profile:
+    # Read the profile once: save_profile may replace it while this awaits
+    snapshot = state.snapshot
+    if not snapshot:
         raise HTTPException(status_code=400, detail="Please create a profile first")
     
-    if not jobs_database:
+    if not state.jobs:
         raise HTTPException(status_code=404, detail="No jobs available")
     
     # Get semantic matcher
-    matcher = get_matcher()
-    
-    # Rank all jobs using pre-computed embeddings
-    ranked_jobs = matcher.rank_jobs(current_profile, jobs_database, job_embeddings_cache)
-    
-    # Generate full match data for each job
-    job_matches = []
-    for job, semantic_score in ranked_jobs:
-        match = create_job_match(job, semantic_score)
-        job_matches.append(match)
+    matcher = state.matcher
     
-    # Apply filter if specified
-    if decision_filter:
-        job_matches = [jm for jm in job_matches if jm.decision == decision_filter]
+    user_embedding = await matcher.acreate_user_embedding(snapshot.profile, snapshot.fp)
     
     # Pagination
-    total_count = len(job_matches)
     start_idx = (page - 1) * page_size
     end_idx = start_idx + page_size
-    paginated_jobs = job_matches[start_idx:end_idx]
     
-    return JobFeedResponse(
+    if not decision_filter:
+        # Ranking alone decides the page: only the top end_idx jobs need
+        # ordering, and only the jobs on the page need analysing
+        ranked_jobs = matcher.rank_jobs(snapshot.profile, state.jobs, user_embedding, top_k=max(end_idx, 0))
+        total_count = len(state.jobs)
+        paginated_jobs = [
+            state.job_match(snapshot, job, semantic_score)
+            for job, semantic_score in ranked_jobs[start_idx:end_idx]
+        ]
+    else:
+        # Rank all jobs using pre-computed embeddings
+        ranked_jobs = matcher.rank_jobs(snapshot.profile, state.jobs, user_embedding)
+        
+        # The histogram gives the total, so the scan below can stop early
+        key = stats_key(snapshot)
+        decisions = state.stats_cache.get(key)
+        if decisions is None:
+            decisions = count_decisions(state, snapshot, ranked_jobs)
+            state.stats_cache[key] = decisions
+        
+        # Only analyse jobs whose fit score can reach the filtered decision,
+        # and stop once the page is filled
+        candidates = decision_candidates(
+            ranked_jobs, state.fit_scores(snapshot, ranked_jobs), state.job_rows, decision_filter
+        )
+        filtered_matches = []
+        for job, semantic_score in candidates:
+            if len(filtered_matches) >= end_idx:
+                break
+            match = state.job_match(snapshot, job, semantic_score)
+            if match.decision == decision_filter:
+                filtered_matches.append(match)
+        
+        total_count = decisions.get(decision_filter, 0)
+        paginated_jobs = filtered_matches[start_idx:end_idx]
+    
+    return model_response(JobFeedResponse.model_construct(
         jobs=paginated_jobs,
         total_count=total_count,
         page=page,
         page_size=page_size
-    )
+    ))
 
 
 @app.get("/api/jobs/{job_id}", response_model=JobMatch)
-async def get_job_detail(job_id: str):
+async def get_job_detail(job_id: str, state: AppState = Depends(get_state)):
     """Get detailed analysis for a specific job"""
     
-    if not current_profile:
+    # Read the profile once: save_profile may replace it while this awaits
+    snapshot = state.snapshot
+    if not snapshot:
         raise HTTPException(status_code=400, detail="Please create a profile first")
     
     # Find job
-    job = next((j for j in jobs_database if j.job_id == job_id), None)
+    job = state.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
     # Get semantic score
-    matcher = get_matcher()
-    user_embedding = matcher.create_user_embedding(current_profile)
-    
-    if job.job_id in job_embeddings_cache:
-        job_embedding = job_embeddings_cache[job.job_id]
-    else:
-        job_embedding = matcher.create_job_embedding(job)
-        
-    semantic_score = matcher.calculate_similarity(user_embedding, job_embedding)
+    matcher = state.matcher
+    user_embedding = await matcher.acreate_user_embedding(snapshot.profile, snapshot.fp)
+    job_embedding = await matcher.aget_job_embedding(job)
+    semantic_score = matcher.score_job(user_embedding, job_embedding)
     
     # Generate full match data
-    return create_job_match(job, semantic_score)
+    return model_response(state.job_match(snapshot, job, semantic_score))
 
 
-def create_job_match(job: Job, semantic_score: float) -> JobMatch:
-    """Helper function to create a complete JobMatch object"""
-    
-    # Calculate fit score
-    fit_score, score_breakdown = calculate_fit_score(
-        current_profile, job, semantic_score
-    )
-    
-    # Generate explanation
-    explanation = generate_explanation(
-        current_profile, job, fit_score, score_breakdown
-    )
-    
-    # Make decision
-    decision, decision_reason = make_decision(
-        fit_score,
-        current_profile,
-        job,
-        explanation.missing_skills,
-        explanation.risk_factors
-    )
-    
-    # Estimate competition
-    competition_level = estimate_competition(job, fit_score)
+def model_response(model: BaseModel) -> Response:
+    """Serialize a response model straight to JSON bytes
     
-    # Assess career impact
-    career_impact = assess_career_impact(job, current_profile, fit_score)
-    
-    # Check for ghost job
-    is_ghost, ghost_warning, quality_score = detect_ghost_job(job)
-    if ghost_warning and ghost_warning not in explanation.risk_factors:
-        explanation.risk_factors.insert(0, ghost_warning)
-    
-    return JobMatch(
-        job=job,
-        fit_score=fit_score,
-        decision=decision,
-        decision_reason=decision_reason,
-        explanation=explanation,
-        competition_level=competition_level,
-        career_impact=career_impact
-    )
+    Returning a Response skips FastAPI's response_model re-validation and
+    jsonable_encoder pass; response_model is still used for the docs.
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+def count_decisions(state: AppState, snapshot: ProfileSnapshot, ranked_jobs) -> Dict[str, int]:
+    """Histogram of decisions over every ranked job
+    
+    Jobs whose vectorized fit score only allows "Avoid" are counted without
+    running the full analysis.
+    """
+    to_analyse = needs_analysis(ranked_jobs, state.fit_scores(snapshot, ranked_jobs), state.job_rows)
+    decisions = {"Apply": 0, "Wait": 0, "Skip": 0, "Avoid": len(ranked_jobs) - len(to_analyse)}
+    for job, semantic_score in to_analyse:
+        decisions[state.job_match(snapshot, job, semantic_score).decision] += 1
+    return decisions
 
 
 @app.get("/api/stats")
-async def get_stats():
+async def get_stats(state: AppState = Depends(get_state)):
     """Get statistics about job matches"""
     
-    if not current_profile:
+    # Read the profile once: save_profile may replace it while this awaits
+    snapshot = state.snapshot
+    if not snapshot:
         raise HTTPException(status_code=400, detail="Please create a profile first")
     
-    matcher = get_matcher()
-    ranked_jobs = matcher.rank_jobs(current_profile, jobs_database, job_embeddings_cache)
-    
-    decisions = {"Apply": 0, "Wait": 0, "Skip": 0, "Avoid": 0}
-    
-    for job, semantic_score in ranked_jobs:
-        match = create_job_match(job, semantic_score)
-        decisions[match.decision] += 1
+    key = stats_key(snapshot)
+    decisions = state.stats_cache.get(key)
+    if decisions is None:
+        matcher = state.matcher
+        user_embedding = await matcher.acreate_user_embedding(snapshot.profile, snapshot.fp)
+        ranked_jobs = matcher.rank_jobs(snapshot.profile, state.jobs, user_embedding)
+        decisions = count_decisions(state, snapshot, ranked_jobs)
+        state.stats_cache[key] = decisions
     
     return {
-        "total_jobs": len(jobs_database),
+        "total_jobs": len(state.jobs),
         "decisions": decisions,
         "recommendation": f"Focus on the {decisions['Apply']} jobs marked 'Apply'"
     }
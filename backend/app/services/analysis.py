@@ -0,0 +1,50 @@
+from app.models import UserProfile, Job, JobMatch
+from app.services.scoring import calculate_fit_score
+from app.services.decision import make_decision, estimate_competition, assess_career_impact
+from app.services.explainer import generate_explanation
+from app.services.detector import detect_ghost_job
+
+
+def create_job_match(profile: UserProfile, job: Job, semantic_score: float) -> JobMatch:
+    """Run the full analysis of a job against a profile"""
+    
+    # Calculate fit score
+    fit_score, score_breakdown = calculate_fit_score(
+        profile, job, semantic_score
+    )
+    
+    # Generate explanation
+    explanation = generate_explanation(
+        profile, job, fit_score, score_breakdown
+    )
+    
+    # Make decision
+    decision, decision_reason = make_decision(
+        fit_score,
+        profile,
+        job,
+        explanation.missing_skills,
+        explanation.risk_factors
+    )
+    
+    # Estimate competition
+    competition_level = estimate_competition(job, fit_score)
+    
+    # Assess career impact
+    career_impact = assess_career_impact(job, profile, fit_score)
+    
+    # Check for ghost job
+    is_ghost, ghost_warning, quality_score = detect_ghost_job(job)
+    if ghost_warning and ghost_warning not in explanation.risk_factors:
+        explanation.risk_factors.insert(0, ghost_warning)
+    
+    # Inputs are already typed by the services, so skip re-validation
+    return JobMatch.model_construct(
+        job=job,
+        fit_score=fit_score,
+        decision=decision,
+        decision_reason=decision_reason,
+        explanation=explanation,
+        competition_level=competition_level,
+        career_impact=career_impact
+    )
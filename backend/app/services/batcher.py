@@ -0,0 +1,106 @@
+"""
+Embedding Batcher
+Coalesces concurrent embedding requests into a single encode call
+"""
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+
+class EmbeddingBatcher:
+    """Async micro-batcher in front of a batch encode function"""
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch: int = 32,
+        max_wait: float = 0.01,
+        executor: Optional[Executor] = None
+    ):
+        """
+        Args:
+            encode_fn: Encodes a list of texts into an (N, D) array
+            max_batch: Maximum number of texts per encode call
+            max_wait: Seconds to wait for more requests before flushing
+            executor: Where encode_fn runs, so it never blocks the event loop
+                (None uses the loop's default executor)
+        """
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background flush task on the running event loop"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flush task and fail any requests still queued"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                _fail(future, RuntimeError("Embedding batcher stopped"))
+            self._queue = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed one text, sharing an encode call with concurrent requests"""
+        if self._worker is None:
+            # Batcher not running (e.g. outside the server), encode directly
+            return (await self._encode([text]))[0]
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run encode_fn on the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.encode_fn, texts)
+
+    async def _run(self) -> None:
+        """Collect queued requests into batches and resolve their futures"""
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+
+            try:
+                # Give concurrent requests a short window to join the batch
+                if self._queue.qsize() + 1 < self.max_batch:
+                    await asyncio.sleep(self.max_wait)
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+                embeddings = await self._encode([text for text, _ in batch])
+            except asyncio.CancelledError:
+                # Stopped while collecting or encoding: the batch is no longer
+                # queued, so fail it here rather than leave its callers hanging
+                for _, future in batch:
+                    _fail(future, RuntimeError("Embedding batcher stopped"))
+                raise
+            except Exception as e:
+                for _, future in batch:
+                    _fail(future, e)
+                continue
+
+            for (_, future), embedding in zip(batch, embeddings):
+                # The caller may have gone away (e.g. client disconnect)
+                if not future.done():
+                    future.set_result(embedding)
+
+
+def _fail(future: asyncio.Future, error: BaseException) -> None:
+    """Set an exception on a pending future"""
+    if not future.done():
+        future.set_exception(error)
@@ -2,6 +2,12 @@ from typing import Tuple
 from app.models import Job, UserProfile
 
 
+# Minimum fit score for each fit-based decision ("Avoid" can apply at any fit)
+APPLY_MIN_FIT = 75
+WAIT_MIN_FIT = 60
+SKIP_MIN_FIT = 40
+
+
 def make_decision(
     fit_score: float,
     profile: UserProfile,
@@ -23,21 +29,21 @@ def make_decision(
                 return "Avoid", f"Critical issues detected: {risk}"
     
     # APPLY - High fit, ready to apply
-    if fit_score >= 75:
+    if fit_score >= APPLY_MIN_FIT:
         if len(missing_skills) <= 1:
             return "Apply", f"Excellent fit ({fit_score}%)! You meet nearly all requirements."
         else:
             return "Apply", f"Strong fit ({fit_score}%) with manageable skill gaps."
     
     # WAIT - Good fit but needs preparation
-    if fit_score >= 60:
+    if fit_score >= WAIT_MIN_FIT:
         if len(missing_skills) <= 3:
             return "Wait", f"Good fit ({fit_score}%), but acquire these skills first: {', '.join(missing_skills[:3])}"
         else:
             return "Wait", f"Decent fit ({fit_score}%), but significant gaps in {len(missing_skills)} skills."
     
     # SKIP - Low fit, better opportunities exist
-    if fit_score >= 40:
+    if fit_score >= SKIP_MIN_FIT:
         return "Skip", f"Moderate fit ({fit_score}%), but there are likely better matches for your profile."
     
     # AVOID - Very poor fit
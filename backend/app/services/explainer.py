@@ -35,7 +35,7 @@ def generate_explanation(
     # 5. Skill gaps with learning recommendations
     skill_gaps = generate_skill_gaps(missing_skills)
     
-    return ExplainabilityBreakdown(
+    return ExplainabilityBreakdown.model_construct(
         matched_skills=matched_skills,
         missing_skills=missing_skills,
         risk_factors=risk_factors,
@@ -170,7 +170,7 @@ def generate_skill_gaps(missing_skills: List[str]) -> List[SkillGap]:
             time = '2-4 weeks'
             resources = [f'Search "{skill}" courses on Coursera', f'YouTube "{skill}" tutorials']
         
-        skill_gaps.append(SkillGap(
+        skill_gaps.append(SkillGap.model_construct(
             skill=skill,
             importance=importance,
             estimated_learning_time=time,
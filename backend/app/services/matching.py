@@ -1,22 +1,83 @@
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
-from typing import List, Dict, Tuple
+import torch
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional
 from app.models import UserProfile, Job
+from app.services.batcher import EmbeddingBatcher
+
+# Single worker thread for model inference: keeps forward passes off the
+# event loop (torch releases the GIL) while serializing them on one device stream
+_MODEL_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encoder")
 
 
 class SemanticMatcher:
     """Semantic job matching using sentence transformers"""
     
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
-        """Initialize the semantic matching model"""
+    # Bump whenever _job_text changes, so cached job embeddings are rebuilt
+    JOB_TEXT_VERSION = 1
+    
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', quantize_cpu: bool = False):
+        """Initialize the semantic matching model
+        
+        Args:
+            model_name: Sentence transformer model to load
+            quantize_cpu: Use dynamic INT8 quantization of the linear layers
+                when running on CPU (slightly changes scores)
+        """
         print(f"Loading semantic model: {model_name}...")
+        self.model_name = model_name
         self.model = SentenceTransformer(model_name)
-        print("Model loaded successfully!")
+        
+        # Reduced precision halves the memory traffic of the encoder
+        if torch.cuda.is_available():
+            self.model.half()
+            self.precision = "fp16"
+        elif quantize_cpu:
+            self.model = torch.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            self.precision = "int8"
+        else:
+            self.precision = "fp32"
+        print(f"Model loaded successfully! ({self.precision})")
+        
+        # Pre-computed job embeddings: one L2-normalized row per job
+        self.job_matrix: Optional[np.ndarray] = None
+        self.job_id_to_row: Dict[str, int] = {}
+        
+        # Last user embedding, keyed by profile fingerprint
+        self._last_user_fp: Optional[bytes] = None
+        self._last_user_vec: Optional[np.ndarray] = None
+        
+        # Coalesces concurrent per-request encodes into one batch
+        self.batcher = EmbeddingBatcher(self._encode_batch, max_batch=32, executor=_MODEL_EXECUTOR)
+    
+    def encode_texts(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Encode texts in one batch into unit-length float32 embeddings (N, D)
+        
+        Blocks until done: meant for startup and offline use. The work still
+        runs on the model thread, so it never overlaps a batcher encode.
+        Request handlers use the async methods instead.
+        """
+        return _MODEL_EXECUTOR.submit(self._encode_batch, texts, batch_size).result()
+    
+    def _encode_batch(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Run the encoder; only call this on the model thread"""
+        embeddings = self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return embeddings.astype(np.float32, copy=False)
     
-    def create_user_embedding(self, profile: UserProfile) -> np.ndarray:
-        """Create embedding from user profile"""
-        # Combine all user information into a rich text representation
+    def _user_text(self, profile: UserProfile) -> str:
+        """Combine all user information into a rich text representation"""
         user_text = f"""
         Professional Profile:
         Skills: {', '.join(profile.skills)}
@@ -28,12 +89,43 @@ class SemanticMatcher:
         if profile.resume_text:
             user_text += f"\nResume: {profile.resume_text}"
         
-        embedding = self.model.encode(user_text, convert_to_tensor=False)
+        return user_text
+    
+    def create_user_embedding(self, profile: UserProfile, fingerprint: Optional[bytes] = None) -> np.ndarray:
+        """Create a unit-length embedding from user profile
+        
+        When a profile fingerprint is given, the embedding of the last
+        profile seen is reused instead of re-running the encoder. Blocks
+        while encoding (see encode_texts); handlers use acreate_user_embedding.
+        """
+        if fingerprint is not None and fingerprint == self._last_user_fp:
+            return self._last_user_vec
+        embedding = self.encode_texts([self._user_text(profile)])[0]
+        self._remember_user_embedding(fingerprint, embedding)
         return embedding
     
-    def create_job_embedding(self, job: Job) -> np.ndarray:
-        """Create embedding from job listing"""
-        job_text = f"""
+    async def acreate_user_embedding(self, profile: UserProfile, fingerprint: Optional[bytes] = None) -> np.ndarray:
+        """Async create_user_embedding, batched with concurrent requests"""
+        if fingerprint is not None and fingerprint == self._last_user_fp:
+            return self._last_user_vec
+        embedding = await self.batcher.embed(self._user_text(profile))
+        self._remember_user_embedding(fingerprint, embedding)
+        return embedding
+    
+    def _remember_user_embedding(self, fingerprint: Optional[bytes], embedding: np.ndarray) -> None:
+        """Keep the embedding of a fingerprinted profile for reuse"""
+        if fingerprint is not None:
+            self._last_user_fp = fingerprint
+            self._last_user_vec = embedding
+    
+    def invalidate_user_embedding(self) -> None:
+        """Forget the memoized user embedding (e.g. after a profile update)"""
+        self._last_user_fp = None
+        self._last_user_vec = None
+    
+    def _job_text(self, job: Job) -> str:
+        """Build the text representation of a job listing"""
+        return f"""
         Job Title: {job.title}
         Company: {job.company}
         Description: {job.description}
@@ -41,85 +133,183 @@ class SemanticMatcher:
         Experience Required: {job.experience_required}
         Location: {job.location}
         """
+    
+    async def acreate_job_embedding(self, job: Job) -> np.ndarray:
+        """Create a unit-length embedding from job listing, batched with concurrent requests"""
+        return await self.batcher.embed(self._job_text(job))
+    
+    def precompute_job_embeddings(
+        self,
+        jobs: List[Job],
+        dataset_path: Optional[Path] = None,
+        dataset_bytes: Optional[bytes] = None
+    ) -> None:
+        """Embed every job once and cache the result as a (N, D) matrix
+        
+        Args:
+            jobs: Jobs to embed, in row order
+            dataset_path: File the jobs were loaded from. When given, the matrix
+                is also cached on disk next to it and reused (memory-mapped)
+                on later startups for the same dataset contents. The mapping
+                is read-only and backed by the OS page cache, so every worker
+                process serving the same dataset shares one copy.
+            dataset_bytes: Contents of dataset_path, if already read
+        """
+        self.job_id_to_row = {job.job_id: row for row, job in enumerate(jobs)}
+        if not jobs:
+            # Nothing to embed or cache (the encoder can't produce a (0, D) matrix)
+            self.job_matrix = None
+            return
         
-        embedding = self.model.encode(job_text, convert_to_tensor=False)
-        return embedding
+        cache_path = None
+        if dataset_path is not None:
+            if dataset_bytes is None:
+                dataset_bytes = dataset_path.read_bytes()
+            cache_path = self._embedding_cache_path(dataset_path, dataset_bytes)
+        
+        matrix = None
+        if cache_path is not None:
+            matrix = self._load_embedding_cache(cache_path, len(jobs))
+        
+        if matrix is None:
+            embeddings = self.encode_texts([self._job_text(job) for job in jobs], batch_size=64)
+            matrix = np.ascontiguousarray(embeddings)
+            if cache_path is not None and self._save_embedding_cache(cache_path, matrix):
+                # Re-open through the page cache so this worker shares it too
+                matrix = np.load(cache_path, mmap_mode='r')
+        
+        self.job_matrix = matrix
+    
+    def _embedding_cache_path(self, dataset_path: Path, dataset_bytes: bytes) -> Path:
+        """Embedding cache file for a dataset
+        
+        The name is specific to the model, the precision, the job text
+        template and the exact dataset contents, so any change to one of
+        them maps to a different file.
+        """
+        model_tag = self.model_name.replace('/', '_')
+        digest = hashlib.blake2b(dataset_bytes, digest_size=8, person=f"jobtext-v{self.JOB_TEXT_VERSION}".encode())
+        return dataset_path.with_name(
+            f"{dataset_path.stem}.{model_tag}.{self.precision}.{digest.hexdigest()}.npy"
+        )
     
-    def calculate_similarity(self, user_embedding: np.ndarray, job_embedding: np.ndarray) -> float:
-        """Calculate cosine similarity between user and job"""
-        # Reshape for sklearn
-        user_emb = user_embedding.reshape(1, -1)
-        job_emb = job_embedding.reshape(1, -1)
+    def _save_embedding_cache(self, cache_path: Path, matrix: np.ndarray) -> bool:
+        """Atomically write the job matrix cache; returns False on failure"""
+        # Write to a per-process temp file first so concurrently starting
+        # workers never see (or map) a partially written cache
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, matrix)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"[WARNING] Could not write embedding cache: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return False
         
-        similarity = cosine_similarity(user_emb, job_emb)[0][0]
-        # Convert to 0-100 scale
-        return float(similarity * 100)
+        # Drop caches of earlier dataset versions for this model and precision
+        prefix = cache_path.name.rsplit('.', 2)[0]
+        for stale_path in cache_path.parent.glob(f"{prefix}.*.npy"):
+            if stale_path != cache_path:
+                try:
+                    stale_path.unlink()
+                except OSError:
+                    pass  # e.g. still mapped by another worker on Windows
+        return True
     
-    def rank_jobs(self, profile: UserProfile, jobs: List[Job], job_embeddings: Dict[str, np.ndarray] = None) -> List[Tuple[Job, float]]:
+    def _load_embedding_cache(self, cache_path: Path, n_jobs: int) -> Optional[np.ndarray]:
+        """Memory-map a cached job matrix, or return None if it is missing or invalid"""
+        if not cache_path.exists():
+            return None
+        
+        try:
+            matrix = np.load(cache_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Ignoring unreadable embedding cache: {e}")
+            return None
+        
+        if matrix.ndim != 2 or matrix.shape[0] != n_jobs or matrix.dtype != np.float32:
+            return None
+        return matrix
+    
+    async def aget_job_embedding(self, job: Job) -> np.ndarray:
+        """Return the cached embedding for a job, encoding it if it is unknown"""
+        row = self.job_id_to_row.get(job.job_id)
+        if row is not None and self.job_matrix is not None:
+            return self.job_matrix[row]
+        return await self.acreate_job_embedding(job)
+    
+    def score_job(self, user_embedding: np.ndarray, job_embedding: np.ndarray) -> float:
+        """Semantic score (0-100) between normalized user and job embeddings"""
+        # Both vectors are unit-length, so the dot product is the cosine similarity
+        return float(job_embedding @ user_embedding * 100)
+    
+    def rank_jobs(
+        self,
+        profile: UserProfile,
+        jobs: List[Job],
+        user_embedding: Optional[np.ndarray] = None,
+        top_k: Optional[int] = None
+    ) -> List[Tuple[Job, float]]:
         """Rank jobs by semantic similarity to user profile
         
+        Uses the pre-computed job matrix when every job has a cached row,
+        otherwise encodes the user and all jobs together in one batch. That
+        encode blocks (see encode_texts); handlers pass user_embedding and
+        rank only pre-computed jobs, which never encodes.
+        
         Args:
             profile: User profile
             jobs: List of jobs to rank
-            job_embeddings: Optional dictionary of pre-computed job embeddings {job_id: embedding}
+            user_embedding: Optional pre-computed user embedding
+            top_k: Only return the k best jobs (avoids sorting the rest)
         """
-        user_embedding = self.create_user_embedding(profile)
+        if not jobs:
+            return []
         
-        job_scores = []
-        
-        if job_embeddings:
-            # Efficient vectorized calculation
-            # Create lists ensuring order matches
-            valid_jobs = []
-            valid_embeddings = []
-            
-            for job in jobs:
-                if job.job_id in job_embeddings:
-                    valid_jobs.append(job)
-                    valid_embeddings.append(job_embeddings[job.job_id])
-            
-            if not valid_jobs:
-                return []
-                
-            # Stack embeddings into a matrix (N, D)
-            job_matrix = np.vstack(valid_embeddings)
-            user_vector = user_embedding.reshape(1, -1)
+        if self.job_matrix is not None and all(job.job_id in self.job_id_to_row for job in jobs):
+            rows = np.fromiter((self.job_id_to_row[job.job_id] for job in jobs), dtype=np.intp, count=len(jobs))
             
-            # Calculate cosine similarity (1, N)
-            similarities = cosine_similarity(user_vector, job_matrix)[0]
-            
-            # Convert to 0-100 scale and zip with jobs
-            for i, job in enumerate(valid_jobs):
-                score = float(similarities[i] * 100)
-                job_scores.append((job, score))
-                
+            # Job rows and the user vector are unit-length, so a single
+            # matrix-vector product yields every cosine similarity
+            if user_embedding is None:
+                user_embedding = self.create_user_embedding(profile)
+            similarities = (self.job_matrix @ user_embedding)[rows]
         else:
-            # Fallback to slower iterative approach
-            for job in jobs:
-                job_embedding = self.create_job_embedding(job)
-                similarity_score = self.calculate_similarity(user_embedding, job_embedding)
-                job_scores.append((job, similarity_score))
+            # One forward pass over the user and every job amortizes the
+            # per-call encoder overhead across the whole batch
+            texts = [self._job_text(job) for job in jobs]
+            if user_embedding is None:
+                texts.insert(0, self._user_text(profile))
+            embeddings = self.encode_texts(texts, batch_size=128)
+            if user_embedding is None:
+                user_embedding, embeddings = embeddings[0], embeddings[1:]
+            similarities = embeddings @ user_embedding
         
         # Sort by score descending
-        job_scores.sort(key=lambda x: x[1], reverse=True)
-        return job_scores
+        if top_k is not None and top_k < len(jobs):
+            # Select the k best in linear time, then sort just those
+            top = np.argpartition(-similarities, max(top_k - 1, 0))[:top_k]
+            order = top[np.lexsort((top, -similarities[top]))]
+        else:
+            order = np.argsort(-similarities, kind='stable')
+        return [(jobs[i], float(similarities[i] * 100)) for i in order]
     
     def get_skill_embedding(self, skill: str) -> np.ndarray:
         """Get embedding for a single skill"""
-        return self.model.encode(skill, convert_to_tensor=False)
+        return self.encode_texts([skill])[0]
     
     def find_similar_skills(self, skill: str, skill_pool: List[str], top_k: int = 3) -> List[str]:
         """Find similar skills to help with gap analysis"""
-        skill_emb = self.get_skill_embedding(skill)
+        if not skill_pool:
+            return []
         
-        similarities = []
-        for pool_skill in skill_pool:
-            pool_emb = self.get_skill_embedding(pool_skill)
-            sim = cosine_similarity(skill_emb.reshape(1, -1), pool_emb.reshape(1, -1))[0][0]
-            similarities.append((pool_skill, sim))
+        # Encode the skill and the whole pool together, then score with one product
+        embeddings = self.encode_texts([skill] + list(skill_pool))
+        similarities = embeddings[1:] @ embeddings[0]
         
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return [s[0] for s in similarities[:top_k]]
+        order = np.argsort(-similarities, kind='stable')[:top_k]
+        return [skill_pool[i] for i in order]
 
 
 # Global instance
@@ -129,5 +319,7 @@ def get_matcher() -> SemanticMatcher:
     """Get or create the global matcher instance"""
     global _matcher_instance
     if _matcher_instance is None:
-        _matcher_instance = SemanticMatcher()
+        _matcher_instance = SemanticMatcher(
+            quantize_cpu=os.getenv("APPLYLESS_INT8", "0") == "1"
+        )
     return _matcher_instance
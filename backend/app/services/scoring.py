@@ -2,6 +2,45 @@ from typing import Tuple
 from app.models import UserProfile, Job
 
 
+# Experience level ranks (unknown levels count as 'mid')
+EXPERIENCE_LEVELS = {
+    'entry': 1,
+    'mid': 2,
+    'senior': 3,
+    'lead': 4,
+    'staff': 5
+}
+
+# Fit score weights per component (each component is on a 0-100 scale)
+FIT_WEIGHTS = {
+    'semantic': 0.4,
+    'skill': 0.3,
+    'experience': 0.2,
+    'preference': 0.1
+}
+
+# Weights bound once at import, so scoring does no dict lookups
+SEMANTIC_WEIGHT = float(FIT_WEIGHTS['semantic'])
+SKILL_WEIGHT = float(FIT_WEIGHTS['skill'])
+EXPERIENCE_WEIGHT = float(FIT_WEIGHTS['experience'])
+PREFERENCE_WEIGHT = float(FIT_WEIGHTS['preference'])
+
+
+def fit_scorer(semantic, skill, experience, preference):
+    """
+    Weighted sum of the four 0-100 fit components
+    
+    Works on floats and numpy arrays alike, so the scalar and vectorized
+    fit scores share this one formula.
+    """
+    return (
+        semantic * SEMANTIC_WEIGHT
+        + skill * SKILL_WEIGHT
+        + experience * EXPERIENCE_WEIGHT
+        + preference * PREFERENCE_WEIGHT
+    )
+
+
 def calculate_fit_score(
     profile: UserProfile,
     job: Job,
@@ -10,15 +49,12 @@ def calculate_fit_score(
     """
     Calculate comprehensive fit score combining multiple factors
     
-    Weights:
-    - Semantic similarity: 40%
-    - Skill overlap: 30%
-    - Experience alignment: 20%
-    - Location/preference match: 10%
+    Semantic similarity, skill overlap, experience alignment and
+    location/preference match, weighted by FIT_WEIGHTS.
     """
     
     # 1. Semantic similarity (already 0-100)
-    semantic_component = semantic_score * 0.4
+    semantic_component = semantic_score * SEMANTIC_WEIGHT
     
     # 2. Skill overlap
     user_skills_lower = [s.lower() for s in profile.skills]
@@ -26,19 +62,20 @@ def calculate_fit_score(
     
     matched_skills = set(user_skills_lower) & set(job_requirements_lower)
     skill_overlap_ratio = len(matched_skills) / len(job_requirements_lower) if job_requirements_lower else 0
-    skill_component = skill_overlap_ratio * 100 * 0.3
+    skill_component = skill_overlap_ratio * 100 * SKILL_WEIGHT
     
     # 3. Experience alignment
     experience_match = calculate_experience_match(profile.experience_level, job.experience_required)
-    experience_component = experience_match * 0.2
+    experience_component = experience_match * EXPERIENCE_WEIGHT
     
     # 4. Location/preference match
     location_match = calculate_location_match(profile.preferred_locations, job.location, job.is_remote)
     role_match = calculate_role_match(profile.preferred_roles, job.title)
-    preference_component = ((location_match + role_match) / 2) * 0.1
+    preference_match = (location_match + role_match) / 2
+    preference_component = preference_match * PREFERENCE_WEIGHT
     
     # Total score
-    total_score = semantic_component + skill_component + experience_component + preference_component
+    total_score = fit_scorer(semantic_score, skill_overlap_ratio * 100, experience_match, preference_match)
     
     # Breakdown for debugging/explanation
     breakdown = {
@@ -60,16 +97,8 @@ def calculate_fit_score(
 
 def calculate_experience_match(user_level: str, job_level: str) -> float:
     """Calculate experience level alignment (0-100)"""
-    levels = {
-        'entry': 1,
-        'mid': 2,
-        'senior': 3,
-        'lead': 4,
-        'staff': 5
-    }
-    
-    user_rank = levels.get(user_level.lower(), 2)
-    job_rank = levels.get(job_level.lower(), 2)
+    user_rank = EXPERIENCE_LEVELS.get(user_level.lower(), 2)
+    job_rank = EXPERIENCE_LEVELS.get(job_level.lower(), 2)
     
     # Perfect match
     if user_rank == job_rank:
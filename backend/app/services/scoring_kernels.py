@@ -0,0 +1,188 @@
+"""
+Scoring Kernels
+Vectorized fit scoring over every job at once
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+import numpy as np
+
+from app.models import UserProfile, Job
+from app.services.scoring import (
+    EXPERIENCE_LEVELS, fit_scorer, calculate_location_match, calculate_role_match
+)
+from app.services.decision import APPLY_MIN_FIT, WAIT_MIN_FIT, SKIP_MIN_FIT
+
+
+# Fit score range each decision can be reached from
+DECISION_FIT_BANDS = {
+    "Apply": (APPLY_MIN_FIT, np.inf),
+    "Wait": (WAIT_MIN_FIT, APPLY_MIN_FIT),
+    "Skip": (SKIP_MIN_FIT, WAIT_MIN_FIT),
+    "Avoid": (-np.inf, np.inf),
+}
+
+# Slack for rounding differences against the scalar fit score
+FIT_TOLERANCE = 0.01
+
+# Below SKIP_MIN_FIT make_decision can only return "Avoid"
+AVOID_ONLY_BELOW_FIT = SKIP_MIN_FIT - FIT_TOLERANCE
+
+
+@dataclass
+class JobFeatures:
+    """Profile-independent job features, one row per job (in jobs list order)"""
+    experience_rank: np.ndarray
+    n_requirements: np.ndarray
+    skill_vocab: Dict[str, int]
+    skill_bits: np.ndarray  # (N, ceil(V / 64)) uint64, bit i set if job requires skill i
+
+
+def build_job_features(jobs: List[Job]) -> JobFeatures:
+    """Extract per-job scoring features once at startup"""
+    # Global vocabulary of (lowercased) required skills
+    skill_vocab: Dict[str, int] = {}
+    for job in jobs:
+        for req in job.requirements:
+            skill_vocab.setdefault(req.lower(), len(skill_vocab))
+
+    skill_bits = np.zeros((len(jobs), _n_words(len(skill_vocab))), dtype=np.uint64)
+    for row, job in enumerate(jobs):
+        skill_bits[row] = skill_bitmap((r.lower() for r in job.requirements), skill_vocab)
+
+    return JobFeatures(
+        experience_rank=np.array(
+            [EXPERIENCE_LEVELS.get(job.experience_required.lower(), 2) for job in jobs],
+            dtype=np.int8
+        ),
+        n_requirements=np.array([len(job.requirements) for job in jobs], dtype=np.int32),
+        skill_vocab=skill_vocab,
+        skill_bits=skill_bits,
+    )
+
+
+def _n_words(n_skills: int) -> int:
+    """Number of 64-bit words needed for a bitmap over n_skills"""
+    return max(1, -(-n_skills // 64))
+
+
+def skill_bitmap(skills, skill_vocab: Dict[str, int]) -> np.ndarray:
+    """Bitmap of the (lowercased) skills present in the vocabulary"""
+    bits = np.zeros(_n_words(len(skill_vocab)), dtype=np.uint64)
+    for skill in skills:
+        index = skill_vocab.get(skill)
+        if index is not None:
+            bits[index // 64] |= np.uint64(1) << np.uint64(index % 64)
+    return bits
+
+
+def count_matched_skills(features: JobFeatures, user_bits: np.ndarray) -> np.ndarray:
+    """Number of each job's required skills present in user_bits"""
+    shared = np.bitwise_and(features.skill_bits, user_bits)
+    # Popcount: unpack every word's bytes into bits and sum per job
+    return np.unpackbits(shared.view(np.uint8), axis=1).sum(axis=1, dtype=np.int32)
+
+
+def score_all(
+    profile: UserProfile,
+    jobs: List[Job],
+    features: JobFeatures,
+    semantic_scores: np.ndarray
+) -> np.ndarray:
+    """
+    Fit score for every job, mirroring calculate_fit_score
+
+    features must be built from jobs; semantic_scores and the result are
+    in the same row order.
+    """
+    n_jobs = len(jobs)
+
+    # Skill overlap
+    user_bits = skill_bitmap((s.lower() for s in profile.skills), features.skill_vocab)
+    matched = count_matched_skills(features, user_bits)
+    skill_overlap_ratio = np.divide(
+        matched, features.n_requirements,
+        out=np.zeros(n_jobs), where=features.n_requirements > 0
+    )
+
+    # Experience alignment
+    user_rank = EXPERIENCE_LEVELS.get(profile.experience_level.lower(), 2)
+    gap = user_rank - features.experience_rank.astype(np.int32)
+    experience_match = np.select(
+        [gap == 0, np.abs(gap) == 1, gap > 0],
+        [100.0, 70.0, 50.0],
+        default=30.0
+    )
+
+    # Location/preference match (string matching, one pass)
+    preference_match = np.fromiter(
+        ((calculate_location_match(profile.preferred_locations, job.location, job.is_remote)
+          + calculate_role_match(profile.preferred_roles, job.title)) / 2
+         for job in jobs),
+        dtype=np.float64, count=n_jobs
+    )
+
+    return fit_scorer(
+        semantic_scores,
+        skill_overlap_ratio * 100,
+        experience_match,
+        preference_match
+    )
+
+
+def score_ranked(
+    profile: UserProfile,
+    jobs: List[Job],
+    features: JobFeatures,
+    job_rows: Dict[str, int],
+    ranked_jobs: List[Tuple[Job, float]]
+) -> np.ndarray:
+    """Fit score of every job in row order, from its ranked semantic score"""
+    rows = np.fromiter(
+        (job_rows[job.job_id] for job, _ in ranked_jobs),
+        dtype=np.intp, count=len(ranked_jobs)
+    )
+    semantic_scores = np.zeros(len(jobs))
+    semantic_scores[rows] = [score for _, score in ranked_jobs]
+    return score_all(profile, jobs, features, semantic_scores)
+
+
+def decision_candidates(
+    ranked_jobs: List[Tuple[Job, float]],
+    fit_scores: np.ndarray,
+    job_rows: Dict[str, int],
+    decision: str
+) -> List[Tuple[Job, float]]:
+    """
+    Keep only the ranked jobs whose fit score allows the given decision
+
+    fit_scores is in row order (see score_ranked). The final decision still
+    needs the full analysis; this just skips jobs that cannot reach it.
+    """
+    band = DECISION_FIT_BANDS.get(decision)
+    if band is None:
+        return []
+    low, high = band
+    if np.isinf(low) and np.isinf(high):
+        return ranked_jobs
+
+    return [
+        (job, semantic_score) for job, semantic_score in ranked_jobs
+        if low - FIT_TOLERANCE <= fit_scores[job_rows[job.job_id]] < high + FIT_TOLERANCE
+    ]
+
+
+def needs_analysis(
+    ranked_jobs: List[Tuple[Job, float]],
+    fit_scores: np.ndarray,
+    job_rows: Dict[str, int]
+) -> List[Tuple[Job, float]]:
+    """
+    Drop the ranked jobs whose fit score already settles the decision
+
+    Every dropped job is an "Avoid", so a decision histogram only needs the
+    full analysis of the jobs returned here.
+    """
+    return [
+        (job, semantic_score) for job, semantic_score in ranked_jobs
+        if fit_scores[job_rows[job.job_id]] >= AVOID_ONLY_BELOW_FIT
+    ]
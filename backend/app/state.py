@@ -0,0 +1,116 @@
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Dict, Tuple
+import hashlib
+
+import numpy as np
+from fastapi import Request
+
+from app.models import UserProfile, Job, JobMatch
+from app.services.analysis import create_job_match
+from app.services.matching import SemanticMatcher
+from app.services.scoring_kernels import JobFeatures, build_job_features, score_ranked
+
+
+@dataclass(frozen=True)
+class ProfileSnapshot:
+    """A profile together with its fingerprint, compared and hashed by fingerprint"""
+    profile: UserProfile = field(compare=False)
+    fp: bytes
+
+
+@dataclass(eq=False)
+class AppState:
+    """In-memory storage shared by the API handlers (for hackathon - replace with real DB later)"""
+    matcher: SemanticMatcher
+    jobs: List[Job] = field(default_factory=list)
+    job_features: Optional[JobFeatures] = None
+    # Replaced as a whole on every update, so a handler that reads it once
+    # keeps a consistent profile across awaits
+    snapshot: Optional[ProfileSnapshot] = None
+    stats_cache: Dict[Tuple[bytes, date], Dict[str, int]] = field(default_factory=dict)  # stats_key -> decision histogram
+    fit_cache: Dict[bytes, np.ndarray] = field(default_factory=dict)  # profile fingerprint -> fit score per job row
+
+    def __post_init__(self):
+        if self.job_features is None:
+            self.job_features = build_job_features(self.jobs)
+
+        # JobMatch analyses, memoized per (profile, job, day) so paging through
+        # the feed, opening a job and loading stats reuse the same analysis.
+        # Ghost job and risk checks depend on posting age, hence the day.
+        self._job_matches = lru_cache(maxsize=8192)(self._build_job_match)
+
+    @property
+    def profile(self) -> Optional[UserProfile]:
+        """Current user profile"""
+        return self.snapshot.profile if self.snapshot else None
+
+    @property
+    def job_matrix(self) -> Optional[np.ndarray]:
+        """Pre-computed job embeddings, one row per job"""
+        return self.matcher.job_matrix
+
+    @property
+    def job_rows(self) -> Dict[str, int]:
+        """Row of each job in jobs, the job matrix and job_features"""
+        return self.matcher.job_id_to_row
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id"""
+        row = self.job_rows.get(job_id)
+        return self.jobs[row] if row is not None else None
+
+    def set_jobs(
+        self,
+        jobs: List[Job],
+        dataset_path: Optional[Path] = None,
+        dataset_bytes: Optional[bytes] = None
+    ) -> None:
+        """Replace the job listings, embed them and rebuild the derived features"""
+        self.jobs = jobs
+        self.matcher.precompute_job_embeddings(jobs, dataset_path, dataset_bytes)
+        self.job_features = build_job_features(jobs)
+
+    def set_profile(self, profile: UserProfile) -> None:
+        """Replace the current profile and drop results computed for the old one"""
+        self.snapshot = ProfileSnapshot(profile, profile_fingerprint(profile))
+        self.stats_cache.clear()
+        self.fit_cache.clear()
+        self._job_matches.cache_clear()
+        self.matcher.invalidate_user_embedding()
+
+    def fit_scores(self, snapshot: ProfileSnapshot, ranked_jobs: List[Tuple[Job, float]]) -> np.ndarray:
+        """Vectorized fit score of every job (row order), computed once per profile
+
+        ranked_jobs must rank every job for the snapshot's profile.
+        """
+        scores = self.fit_cache.get(snapshot.fp)
+        if scores is None:
+            scores = score_ranked(snapshot.profile, self.jobs, self.job_features, self.job_rows, ranked_jobs)
+            self.fit_cache[snapshot.fp] = scores
+        return scores
+
+    def job_match(self, snapshot: ProfileSnapshot, job: Job, semantic_score: float) -> JobMatch:
+        """Complete JobMatch of a job against a profile snapshot"""
+        return self._job_matches(snapshot, job.job_id, round(semantic_score, 4), date.today())
+
+    def _build_job_match(self, snapshot: ProfileSnapshot, job_id: str, semantic_score: float, day: date) -> JobMatch:
+        """Uncached job_match; day only keys the memo"""
+        return create_job_match(snapshot.profile, self.get_job(job_id), semantic_score)
+
+
+def stats_key(snapshot: ProfileSnapshot) -> Tuple[bytes, date]:
+    """stats_cache key: decisions depend on the profile and, via posting age, the day"""
+    return snapshot.fp, date.today()
+
+
+def profile_fingerprint(profile: UserProfile) -> bytes:
+    """Stable hash of a profile, used as the cache key for its analyses"""
+    return hashlib.blake2b(profile.model_dump_json().encode(), digest_size=16).digest()
+
+
+def get_state(request: Request) -> AppState:
+    """FastAPI dependency returning the application state"""
+    return request.app.state.data
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from typing import List
+
+import numpy as np
+import pytest
+
+from app.services.batcher import EmbeddingBatcher
+
+
+class RecordingEncoder:
+    """Fake encode_fn: text i maps to [len(text), i], and every call is recorded"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls: List[List[str]] = []
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        self.calls.append(list(texts))
+        time.sleep(self.delay)
+        return np.array([[len(text), i] for i, text in enumerate(texts)], dtype=np.float32)
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=5))
+
+
+def test_embed_without_start_encodes_directly():
+    encoder = RecordingEncoder()
+
+    async def scenario():
+        return await EmbeddingBatcher(encoder).embed("abc")
+
+    assert run(scenario()).tolist() == [3, 0]
+    assert encoder.calls == [["abc"]]
+
+
+def test_concurrent_embeds_share_one_encode():
+    encoder = RecordingEncoder()
+
+    async def scenario():
+        batcher = EmbeddingBatcher(encoder, max_batch=8, max_wait=0.05)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.embed("x" * n) for n in range(1, 6)))
+        finally:
+            await batcher.stop()
+
+    results = run(scenario())
+    assert [r[0] for r in results] == [1, 2, 3, 4, 5]
+    assert len(encoder.calls) == 1
+
+
+def test_batches_are_capped_at_max_batch():
+    encoder = RecordingEncoder()
+
+    async def scenario():
+        batcher = EmbeddingBatcher(encoder, max_batch=2, max_wait=0.05)
+        batcher.start()
+        try:
+            await asyncio.gather(*(batcher.embed(str(n)) for n in range(5)))
+        finally:
+            await batcher.stop()
+
+    run(scenario())
+    assert [len(call) for call in encoder.calls] == [2, 2, 1]
+
+
+def test_encode_error_fails_the_whole_batch():
+    def failing_encoder(texts):
+        raise ValueError("boom")
+
+    async def scenario():
+        batcher = EmbeddingBatcher(failing_encoder, max_wait=0.05)
+        batcher.start()
+        try:
+            return await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    results = run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+@pytest.mark.parametrize("encode_delay, max_wait, max_batch", [
+    (0.0, 0.5, 8),  # stopped while waiting for the batch to fill
+    (0.5, 0.0, 8),  # stopped while the batch is being encoded
+    (0.5, 0.0, 2),  # stopped with requests still queued behind the batch
+])
+def test_stop_fails_pending_embeds(encode_delay, max_wait, max_batch):
+    encoder = RecordingEncoder(delay=encode_delay)
+
+    async def scenario():
+        batcher = EmbeddingBatcher(encoder, max_batch=max_batch, max_wait=max_wait)
+        batcher.start()
+        tasks = [asyncio.create_task(batcher.embed(str(n))) for n in range(5)]
+        await asyncio.sleep(0.05)
+        await batcher.stop()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = run(scenario())
+    assert len(results) == 5
+    assert all(isinstance(r, RuntimeError) for r in results)
@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("torch")
+
+from app.models import UserProfile
+from app.services.matching import SemanticMatcher
+
+
+@pytest.fixture(scope="module")
+def matcher() -> SemanticMatcher:
+    return SemanticMatcher()
+
+
+@pytest.fixture
+def profile() -> UserProfile:
+    return UserProfile(
+        user_id="test",
+        personal_info={"full_name": "Test", "email": "t@example.com", "phone_number": "1", "address": "x"},
+        social_profiles={},
+        skills=["Python"],
+        experience_years=3,
+        experience_level="Mid",
+        preferred_roles=["Backend Engineer"],
+        preferred_locations=["Remote"],
+        career_goals="grow",
+        work_preferences={},
+    )
+
+
+def test_rank_jobs_with_no_jobs(matcher, profile):
+    user_embedding = matcher.create_user_embedding(profile)
+    assert matcher.rank_jobs(profile, [], user_embedding) == []
+    assert matcher.rank_jobs(profile, []) == []
+
+
+def test_empty_dataset_writes_no_embedding_cache(matcher, tmp_path: Path):
+    dataset_path = tmp_path / "jobs.json"
+    dataset_path.write_bytes(b"[]")
+
+    matcher.precompute_job_embeddings([], dataset_path)
+
+    assert matcher.job_id_to_row == {}
+    assert list(tmp_path.glob("*.npy")) == []
@@ -0,0 +1,85 @@
+import random
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+from pydantic import TypeAdapter
+
+from app.models import Job, UserProfile
+from app.services import detector, explainer
+from app.services.analysis import create_job_match
+from app.services.scoring import calculate_fit_score
+from app.services.scoring_kernels import (
+    FIT_TOLERANCE, build_job_features, decision_candidates, needs_analysis, score_all, score_ranked
+)
+
+DATASET = Path(__file__).parent.parent / "data" / "jobs_dataset.json"
+
+
+@pytest.fixture(scope="module")
+def jobs() -> List[Job]:
+    return TypeAdapter(List[Job]).validate_json(DATASET.read_bytes())
+
+
+def random_profile(rnd: random.Random, jobs: List[Job]) -> UserProfile:
+    """Profile with a random mix of dataset skills, odd casing and unknown levels"""
+    skill_pool = sorted({req for job in jobs for req in job.requirements}) + ["Rust", "go"]
+    return UserProfile(
+        user_id="test",
+        personal_info={"full_name": "Test", "email": "t@example.com", "phone_number": "1", "address": "x"},
+        social_profiles={},
+        skills=[s if rnd.random() < 0.5 else s.upper() for s in rnd.sample(skill_pool, rnd.randint(0, 12))],
+        experience_years=rnd.randint(0, 12),
+        experience_level=rnd.choice(["Entry", "Mid", "Senior", "Lead", "Staff", "Unknown"]),
+        preferred_roles=rnd.sample(["Frontend Engineer", "Backend", "Data Scientist", "DevOps", "Engineer"], 2),
+        preferred_locations=rnd.sample(["Remote", "San Francisco", "New York", "Austin"], 2),
+        career_goals="grow",
+        work_preferences={},
+    )
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_score_all_matches_calculate_fit_score(jobs, seed):
+    rnd = random.Random(seed)
+    profile = random_profile(rnd, jobs)
+    semantic_scores = np.array([rnd.uniform(-10, 90) for _ in jobs])
+
+    fit_scores = score_all(profile, jobs, build_job_features(jobs), semantic_scores)
+
+    for job, semantic_score, fit_score in zip(jobs, semantic_scores, fit_scores):
+        expected, _ = calculate_fit_score(profile, job, float(semantic_score))
+        assert abs(fit_score - expected) <= FIT_TOLERANCE
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_pruning_keeps_every_match(jobs, seed, monkeypatch):
+    # Pin "now" close to the postings so fit scores, not age, drive the decisions
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2026, 2, 10)
+
+    monkeypatch.setattr(detector, "datetime", FixedDatetime)
+    monkeypatch.setattr(explainer, "datetime", FixedDatetime)
+
+    rnd = random.Random(seed)
+    profile = random_profile(rnd, jobs)
+    ranked_jobs = [(job, rnd.uniform(30, 100)) for job in jobs]
+    job_rows = {job.job_id: row for row, job in enumerate(jobs)}
+    fit_scores = score_ranked(profile, jobs, build_job_features(jobs), job_rows, ranked_jobs)
+
+    decisions = {job.job_id: create_job_match(profile, job, score).decision for job, score in ranked_jobs}
+
+    for decision in ["Apply", "Wait", "Skip", "Avoid"]:
+        kept = {job.job_id for job, _ in decision_candidates(ranked_jobs, fit_scores, job_rows, decision)}
+        for job_id, job_decision in decisions.items():
+            if job_decision == decision:
+                assert job_id in kept
+
+    # Jobs left out of the analysis must all be "Avoid"
+    analysed = {job.job_id for job, _ in needs_analysis(ranked_jobs, fit_scores, job_rows)}
+    for job_id, job_decision in decisions.items():
+        if job_id not in analysed:
+            assert job_decision == "Avoid"